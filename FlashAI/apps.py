@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FlashaiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'FlashAI'
+
+    def ready(self):
+        from . import signals  # noqa: F401
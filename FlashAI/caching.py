@@ -0,0 +1,76 @@
+"""Per-user cache helpers for flashcard lookups.
+
+Keys are invalidated by the Flashcard signal handlers in ``signals.py``;
+writes that bypass signals (bulk_create, moving a card to another category)
+invalidate explicitly. Invalidation only reaches other processes through a
+shared backend, so with a per-process cache the helpers read the database.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Flashcard
+
+FLASHCARD_COUNT_TIMEOUT = 60
+STUDY_CARDS_TIMEOUT = 300
+
+_PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_enabled():
+    """True when the default cache is shared by all web and worker processes."""
+    return settings.CACHES['default']['BACKEND'] not in _PROCESS_LOCAL_BACKENDS
+
+
+def flashcard_count_key(user_id):
+    return f'fc_count:{user_id}'
+
+
+def study_cards_key(user_id, category_id):
+    return f'study:{user_id}:{category_id}'
+
+
+def get_user_flashcard_count(user_id):
+    """Return the number of flashcards owned by ``user_id``, cached when shared."""
+    count_query = Flashcard.objects.filter(user_id=user_id).count
+    if not shared_cache_enabled():
+        return count_query()
+    return cache.get_or_set(flashcard_count_key(user_id), count_query, FLASHCARD_COUNT_TIMEOUT)
+
+
+def invalidate_user_flashcards(user_id):
+    cache.delete(flashcard_count_key(user_id))
+
+
+def _build_study_cards(user_id, category_id):
+    rows = Flashcard.objects.filter(category_id=category_id, user_id=user_id).values_list(
+        'question', 'answer',
+        'option_a', 'option_b', 'option_c', 'option_d', 'correct_option',
+    )
+    return [
+        {
+            "question": question,
+            "answer": answer,
+            "options": [o for o in (a, b, c, d) if o],
+            "correct": correct or "",
+        }
+        for question, answer, a, b, c, d, correct in rows
+    ]
+
+
+def get_study_cards(user_id, category_id):
+    """Return the study-mode card dicts for one of a user's categories, cached when shared."""
+    if not shared_cache_enabled():
+        return _build_study_cards(user_id, category_id)
+    return cache.get_or_set(
+        study_cards_key(user_id, category_id),
+        lambda: _build_study_cards(user_id, category_id),
+        STUDY_CARDS_TIMEOUT,
+    )
+
+
+def invalidate_study_cards(user_id, category_id):
+    cache.delete(study_cards_key(user_id, category_id))
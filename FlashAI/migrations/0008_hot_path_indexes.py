@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlashAI', '0007_category_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flashcard',
+            index=models.Index(fields=['user', 'category', '-created_at'], name='flashcard_user_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdfdocument',
+            index=models.Index(fields=['user', '-uploaded_at'], name='pdfdocument_user_uploaded_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:35
+
+from django.db import migrations, models
+
+
+def merge_duplicate_categories(apps, schema_editor):
+    """Fold same-named categories of a user into the oldest one."""
+    Category = apps.get_model('FlashAI', 'Category')
+    Flashcard = apps.get_model('FlashAI', 'Flashcard')
+    dupes = (
+        Category.objects.filter(user__isnull=False)
+        .values('user_id', 'name')
+        .annotate(n=models.Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in dupes:
+        ids = list(
+            Category.objects.filter(user_id=row['user_id'], name=row['name'])
+            .order_by('id').values_list('id', flat=True)
+        )
+        keep, extra = ids[0], ids[1:]
+        Flashcard.objects.filter(category_id__in=extra).update(category_id=keep)
+        Category.objects.filter(id__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+    # Kept apart from the unique constraint in 0010: on PostgreSQL the merge
+    # leaves deferred FK checks pending, and ALTER TABLE in the same
+    # transaction fails with "pending trigger events".
+
+    dependencies = [
+        ('FlashAI', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_categories, migrations.RunPython.noop),
+    ]
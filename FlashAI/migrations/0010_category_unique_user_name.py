@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlashAI', '0009_merge_duplicate_categories'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='uniq_category_user_name'),
+        ),
+    ]
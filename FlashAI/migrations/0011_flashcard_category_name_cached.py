@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:38
+
+from django.db import migrations, models
+
+
+def backfill_category_names(apps, schema_editor):
+    Category = apps.get_model('FlashAI', 'Category')
+    Flashcard = apps.get_model('FlashAI', 'Flashcard')
+    Flashcard.objects.update(
+        category_name_cached=models.Subquery(
+            Category.objects.filter(pk=models.OuterRef('category_id')).values('name')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlashAI', '0010_category_unique_user_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flashcard',
+            name='category_name_cached',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.RunPython(backfill_category_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlashAI', '0011_flashcard_category_name_cached'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='status',
+            # Documents uploaded before background processing were handled in-request
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('empty', 'No text found'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='pdfdocument',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('empty', 'No text found'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlashAI', '0012_pdfdocument_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flashcard',
+            index=models.Index(fields=['user', '-created_at'], name='flashcard_user_created_idx'),
+        ),
+    ]
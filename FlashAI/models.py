@@ -6,14 +6,32 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='categories', null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='uniq_category_user_name'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # A new category has no flashcards to relabel yet
+            return
+        # Keep the denormalised label on this category's flashcards in sync
+        Flashcard.objects.filter(category=self).exclude(category_name_cached=self.name).update(
+            category_name_cached=self.name
+        )
+
 
 class Flashcard(models.Model):
     question = models.CharField(max_length=255)
     answer = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Copy of category.name so list views can render the label without a join
+    category_name_cached = models.CharField(max_length=100, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='flashcards', null=True, blank=True)
     # Optional multiple-choice fields
@@ -27,8 +45,36 @@ class Flashcard(models.Model):
         blank=True
     )
 
+    class Meta:
+        # Matches the per-user list/study queries: filter on user (+ category),
+        # newest first. The (user, created_at) index serves the dashboard's
+        # "newest N of all categories" query, which cannot use the category
+        # index's ordering.
+        indexes = [
+            models.Index(fields=['user', 'category', '-created_at'], name='flashcard_user_cat_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='flashcard_user_created_idx'),
+        ]
+
     def __str__(self):
         return self.question
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded category so save() can tell if it changed
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Only refresh the label when it may be stale; reading self.category
+        # for an unchanged, unloaded category would cost a SELECT per save.
+        if self.category_id is not None and (
+            self._meta.get_field('category').is_cached(self)
+            or self.category_id != getattr(self, '_loaded_category_id', None)
+        ):
+            self.category_name_cached = self.category.name
+        super().save(*args, **kwargs)
+        self._loaded_category_id = self.category_id
     
 
 class PDFDocument(models.Model):
@@ -36,6 +82,20 @@ class PDFDocument(models.Model):
     pdf_file = models.FileField(upload_to='pdfs/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='pdfs', null=True, blank=True)
+    # Progress of the background flashcard generation (see tasks.process_pdf)
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            ('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'),
+            ('empty', 'No text found'), ('failed', 'Failed'),
+        ],
+        default='pending',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-uploaded_at'], name='pdfdocument_user_uploaded_idx'),
+        ]
 
     def __str__(self):
         # Safely return the stored file name (pdf_file) and timestamp
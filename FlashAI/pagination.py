@@ -0,0 +1,48 @@
+"""Keyset ("seek") pagination over (timestamp, id) ordered querysets.
+
+Unlike OFFSET paging, fetching a later page costs the same as the first one:
+the cursor is the (timestamp, id) of the last row shown, and the next page is
+a range read on an index whose columns are the queryset's equality filters
+followed by the timestamp (e.g. Flashcard's (user, -created_at)).
+"""
+
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(timestamp, pk):
+    return f"{timestamp.isoformat()}|{pk}"
+
+
+def decode_cursor(cursor):
+    """Return ``(timestamp, pk)`` from a cursor string, or None if malformed."""
+    if not cursor:
+        return None
+    try:
+        ts, pk = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_page(queryset, cursor, page_size, field='created_at'):
+    """Return one page of ``queryset`` (newest first) and the next cursor.
+
+    ``next_cursor`` is None when there are no older rows.
+    """
+    position = decode_cursor(cursor)
+    if position:
+        ts, pk = position
+        # The redundant <= bound gives the planner a range on ``field`` to
+        # seek; the OR alone is not index-sargable.
+        queryset = queryset.filter(**{f'{field}__lte': ts}).filter(
+            Q(**{f'{field}__lt': ts}) | Q(**{field: ts, 'id__lt': pk})
+        )
+    rows = list(queryset.order_by(f'-{field}', '-id')[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_study_cards, invalidate_user_flashcards
+from .models import Flashcard
+
+
+@receiver(post_save, sender=Flashcard)
+@receiver(post_delete, sender=Flashcard)
+def flashcard_changed(sender, instance, **kwargs):
+    if instance.user_id:
+        invalidate_user_flashcards(instance.user_id)
+        invalidate_study_cards(instance.user_id, instance.category_id)
@@ -0,0 +1,121 @@
+"""Background processing for uploaded PDFs.
+
+``process_pdf`` is a Celery task when Celery is installed, and
+``enqueue_pdf`` queues it when ``CELERY_BROKER_URL`` is configured and the
+cache is shared with the worker (``CACHE_URL``), so the worker's cache
+invalidation reaches the web processes. Otherwise it runs inline so uploads
+still work on a single-process deployment.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import invalidate_study_cards, invalidate_user_flashcards, shared_cache_enabled
+from .models import Category, Flashcard, PDFDocument
+from .utils import extract_text_from_pdf, generate_flashcards_with_ai
+
+try:
+    from celery import shared_task
+except Exception:
+    shared_task = None
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT when saving generated cards; the backend may lower it further
+# (SQLite caps the number of bound parameters per statement).
+BULK_BATCH_SIZE = getattr(settings, 'FLASHAI_BULK_BATCH', 500)
+# PDFs yielding fewer extracted words than this are marked 'empty' unprocessed
+MIN_TEXT_WORDS = 20
+
+
+def process_pdf(pdf_id, category_name):
+    """Extract text from a stored PDFDocument and create its flashcards.
+
+    ``PDFDocument.status`` moves pending -> processing -> done (or empty /
+    failed) so the upload page can report progress; the final status is
+    returned. Only pending or failed documents are claimed; any other status
+    is returned untouched. Extraction and generation run before any write so the (slow)
+    AI call never holds a database transaction open.
+    """
+    # Claim the document atomically so a duplicate delivery (even one that
+    # arrives while the first run is still processing) never builds twice.
+    claimed = PDFDocument.objects.filter(
+        pk=pdf_id, status__in=('pending', 'failed')
+    ).update(status='processing')
+    pdf = PDFDocument.objects.filter(pk=pdf_id).first()
+    if pdf is None:
+        return None
+    if not claimed:
+        return pdf.status
+    try:
+        created = _build_flashcards(pdf, category_name)
+    except Exception:
+        logger.exception("Flashcard generation failed for PDF %s", pdf_id)
+        status = 'failed'
+    else:
+        status = 'empty' if created is None else 'done'
+    PDFDocument.objects.filter(pk=pdf_id).update(status=status)
+    return status
+
+
+def _build_flashcards(pdf, category_name):
+    try:
+        # Local storage: let the PDF backend open the file itself
+        extracted_text = extract_text_from_pdf(pdf.pdf_file.path)
+    except NotImplementedError:
+        with pdf.pdf_file.open('rb') as fh:
+            extracted_text = extract_text_from_pdf(fh)
+    # Scanned or graphics-only PDFs: nothing worth sending to the AI
+    if len(extracted_text.split(None, MIN_TEXT_WORDS)) < MIN_TEXT_WORDS:
+        return None
+    flashcards_data = generate_flashcards_with_ai(extracted_text)
+
+    with transaction.atomic():
+        category_obj, _ = Category.objects.get_or_create(name=category_name, user_id=pdf.user_id)
+        # Plain FK ids: no related-object assignment per card
+        user_id, category_id, label = pdf.user_id, category_obj.pk, category_obj.name
+        new_cards = []
+        for card in flashcards_data:
+            question = card.get('question', '').strip()[:255]
+            answer = card.get('answer', '').strip()
+            if question and answer:
+                new_cards.append(Flashcard(
+                    question=question,
+                    answer=answer,
+                    category_id=category_id,
+                    category_name_cached=label,
+                    user_id=user_id,
+                    option_a=card.get('option_a', ''),
+                    option_b=card.get('option_b', ''),
+                    option_c=card.get('option_c', ''),
+                    option_d=card.get('option_d', ''),
+                    correct_option=card.get('correct_option', '')
+                ))
+        Flashcard.objects.bulk_create(new_cards, batch_size=BULK_BATCH_SIZE)
+    if new_cards and user_id:
+        # bulk_create skips post_save, so drop the cached count and deck here
+        invalidate_user_flashcards(user_id)
+        invalidate_study_cards(user_id, category_id)
+    return len(new_cards)
+
+
+if shared_task is not None:
+    process_pdf = shared_task(process_pdf)
+
+
+def enqueue_pdf(pdf_id, category_name):
+    """Queue ``process_pdf`` once the current transaction commits, or run it now.
+
+    Returns the final status when run inline, None when queued.
+    """
+    queued = (
+        shared_task is not None
+        and getattr(settings, 'CELERY_BROKER_URL', '')
+        and shared_cache_enabled()
+    )
+    if queued:
+        transaction.on_commit(lambda: process_pdf.delay(pdf_id, category_name))
+        return None
+    return process_pdf(pdf_id, category_name)
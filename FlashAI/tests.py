@@ -1,3 +1,372 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import PyPDF2
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Category, Flashcard, PDFDocument
+from .pagination import keyset_page
+from .tasks import process_pdf
+from . import utils
+from .caching import get_study_cards, get_user_flashcard_count
+from .utils import _DEFINITION_RE, _fallback_flashcards, extract_last_json_array
+
+
+def make_cards(user, category, n):
+    """Create ``n`` cards with distinct created_at values, oldest first."""
+    now = timezone.now()
+    cards = Flashcard.objects.bulk_create(
+        Flashcard(question=f'Q{i}', answer=f'A{i}', category=category, user=user,
+                  category_name_cached=category.name)
+        for i in range(n)
+    )
+    for i, card in enumerate(cards):
+        Flashcard.objects.filter(pk=card.pk).update(created_at=now - timedelta(minutes=n - i))
+    return cards
+
+
+def make_pdf(content):
+    """Return a one-page PDF (file-like) whose content stream is ``content``."""
+    page = PyPDF2.PageObject.create_blank_page(width=200, height=200)
+    font = DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    })
+    page[NameObject('/Resources')] = DictionaryObject({
+        NameObject('/Font'): DictionaryObject({NameObject('/F1'): font}),
+    })
+    stream = DecodedStreamObject()
+    stream.set_data(content)
+    page[NameObject('/Contents')] = stream
+    writer = PyPDF2.PdfWriter()
+    writer.add_page(page)
+    buf = io.BytesIO()
+    writer.write(buf)
+    buf.seek(0)
+    return buf
+
+
+class FlashcardListQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.category = Category.objects.create(name='Net', user=self.user)
+        self.client.force_login(self.user)
+
+    def test_query_count_does_not_grow_with_deck(self):
+        make_cards(self.user, self.category, 3)
+        # session + user + one flashcard page query
+        with self.assertNumQueries(3):
+            response = self.client.get('/list/')
+        self.assertEqual(len(response.context['flashcards']), 3)
+
+        make_cards(self.user, self.category, 40)
+        with self.assertNumQueries(3):
+            response = self.client.get('/list/')
+        self.assertEqual(len(response.context['flashcards']), 25)
+
+    def test_lists_only_own_cards(self):
+        other = User.objects.create_user('bob', password='pw')
+        make_cards(other, Category.objects.create(name='Net', user=other), 2)
+        make_cards(self.user, self.category, 1)
+        response = self.client.get('/list/')
+        self.assertEqual([c.user_id for c in response.context['flashcards']], [self.user.id])
+
+    def test_newest_link_only_after_a_valid_cursor(self):
+        make_cards(self.user, self.category, 30)
+        response = self.client.get('/list/')
+        self.assertTrue(response.context['is_first_page'])
+        response = self.client.get('/list/', {'before': response.context['next_cursor']})
+        self.assertFalse(response.context['is_first_page'])
+        # A malformed cursor falls back to the first page, so no "Newest" link
+        response = self.client.get('/list/', {'before': 'garbage'})
+        self.assertTrue(response.context['is_first_page'])
+        self.assertNotContains(response, 'Newest')
+
+
+class KeysetPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        category = Category.objects.create(name='Net', user=self.user)
+        self.cards = make_cards(self.user, category, 5)
+        self.qs = Flashcard.objects.filter(user=self.user)
+
+    def test_two_pages(self):
+        first, cursor = keyset_page(self.qs, None, 3)
+        self.assertEqual([c.question for c in first], ['Q4', 'Q3', 'Q2'])
+        self.assertIsNotNone(cursor)
+
+        second, cursor = keyset_page(self.qs, cursor, 3)
+        self.assertEqual([c.question for c in second], ['Q1', 'Q0'])
+        self.assertIsNone(cursor)
+
+    def test_ties_on_timestamp_are_split_by_id(self):
+        Flashcard.objects.filter(user=self.user).update(created_at=timezone.now())
+        first, cursor = keyset_page(self.qs, None, 3)
+        second, _ = keyset_page(self.qs, cursor, 3)
+        ids = [c.pk for c in first + second]
+        self.assertEqual(ids, sorted((c.pk for c in self.cards), reverse=True))
+
+    def test_malformed_cursor_returns_first_page(self):
+        first, _ = keyset_page(self.qs, None, 3)
+        for cursor in ('garbage', 'not-a-date|3', '2024-01-01T00:00:00|x'):
+            page, _ = keyset_page(self.qs, cursor, 3)
+            self.assertEqual(page, first)
+
+
+class ExtractLastJsonArrayTests(TestCase):
+    def test_nested_arrays_return_last_top_level_array(self):
+        text = 'x [1, [2, 3]] y [{"a": [1, 2]}, {"b": [3]}] z'
+        self.assertEqual(json.loads(extract_last_json_array(text)), [{'a': [1, 2]}, {'b': [3]}])
+
+    def test_bracket_inside_string_is_ignored(self):
+        text = 'pre [{"q": "a ] b [c"}] post'
+        self.assertEqual(json.loads(extract_last_json_array(text)), [{'q': 'a ] b [c'}])
+
+    def test_truncated_array_is_closed(self):
+        for text in ('out: [{"q": "1"}, {"q": "2"', 'out: [{"q": "1"}, {"q": "2"}'):
+            self.assertEqual(json.loads(extract_last_json_array(text)), [{'q': '1'}, {'q': '2'}])
+
+    def test_no_array(self):
+        self.assertIsNone(extract_last_json_array('no array here'))
+
+
+class DefinitionRegexTests(TestCase):
+    def assertForm(self, sentence, group, **parts):
+        m = _DEFINITION_RE.match(sentence)
+        self.assertIsNotNone(m, sentence)
+        self.assertEqual(m.lastgroup, group)
+        for name, value in parts.items():
+            self.assertEqual(m.group(name), value)
+
+    def test_each_form_sets_its_named_group(self):
+        self.assertForm('Docker: a container runtime', 'colon_rest', colon_subj='Docker')
+        self.assertForm('Docker is a container runtime', 'is_pred', is_subj='Docker')
+        self.assertForm('Containers are isolated processes', 'are_pred', are_subj='Containers')
+        self.assertForm('HTTP stands for Hypertext Transfer Protocol', 'means_rest',
+                        means_subj='HTTP', means_verb='stands for')
+
+    def test_keywords_are_case_insensitive(self):
+        self.assertForm('In networking, A Router IS a device', 'is_pred', is_subj='Router')
+        self.assertForm('Containers ARE isolated processes', 'are_pred')
+        self.assertForm('TLS Refers To transport security', 'means_rest', means_verb='Refers To')
+
+    def test_plain_sentence_does_not_match(self):
+        self.assertIsNone(_DEFINITION_RE.match('Nothing here matches at all'))
+
+    def test_fallback_questions(self):
+        text = ('Docker is a container runtime. HTTP stands for Hypertext Transfer Protocol. '
+                'Containers are isolated processes. ')
+        self.assertEqual(
+            [card['question'] for card in _fallback_flashcards(text)],
+            ['What is Docker?', 'What does HTTP stand for?', 'What are Containers?'],
+        )
+
+
+class CategoryNameCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.net = Category.objects.create(name='Net', user=self.user)
+        self.ops = Category.objects.create(name='Ops', user=self.user)
+        self.card = Flashcard.objects.create(question='Q', answer='A', category=self.net, user=self.user)
+
+    def test_creating_a_category_is_a_single_insert(self):
+        with self.assertNumQueries(1):
+            Category.objects.create(name='New', user=self.user)
+
+    def test_rename_relabels_cards(self):
+        self.net.name = 'Networking'
+        self.net.save()
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.category_name_cached, 'Networking')
+
+    def test_save_with_unchanged_category_does_not_load_it(self):
+        card = Flashcard.objects.get(pk=self.card.pk)
+        card.question = 'Q2'
+        with self.assertNumQueries(1):
+            card.save()
+        self.assertEqual(card.category_name_cached, 'Net')
+
+    def test_moving_card_refreshes_label(self):
+        card = Flashcard.objects.get(pk=self.card.pk)
+        card.category_id = self.ops.pk
+        card.save()
+        self.assertEqual(Flashcard.objects.get(pk=card.pk).category_name_cached, 'Ops')
+
+        card.category = self.net
+        with self.assertNumQueries(1):
+            card.save()
+        self.assertEqual(Flashcard.objects.get(pk=card.pk).category_name_cached, 'Net')
+
+
+def use_shared_cache(test):
+    """Run ``test`` as if the default cache were shared across processes."""
+    patcher = mock.patch('FlashAI.caching.shared_cache_enabled', return_value=True)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    cache.clear()
+    test.addCleanup(cache.clear)
+
+
+class FlashcardCountCacheTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.user = User.objects.create_user('alice', password='pw')
+        self.category = Category.objects.create(name='Net', user=self.user)
+        make_cards(self.user, self.category, 2)
+
+    def test_count_is_cached(self):
+        self.assertEqual(get_user_flashcard_count(self.user.id), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_flashcard_count(self.user.id), 2)
+
+    def test_process_local_cache_is_bypassed(self):
+        with mock.patch('FlashAI.caching.shared_cache_enabled', return_value=False):
+            get_user_flashcard_count(self.user.id)
+            with self.assertNumQueries(1):
+                get_user_flashcard_count(self.user.id)
+
+    def test_save_and_delete_invalidate(self):
+        get_user_flashcard_count(self.user.id)
+        card = Flashcard.objects.create(question='Q', answer='A', category=self.category, user=self.user)
+        self.assertEqual(get_user_flashcard_count(self.user.id), 3)
+        card.delete()
+        self.assertEqual(get_user_flashcard_count(self.user.id), 2)
+
+
+class StudyCardsCacheTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.user = User.objects.create_user('alice', password='pw')
+        self.net = Category.objects.create(name='Net', user=self.user)
+        self.ops = Category.objects.create(name='Ops', user=self.user)
+        self.card = Flashcard.objects.create(question='Q', answer='A', category=self.net, user=self.user)
+
+    def questions(self, category):
+        return [c['question'] for c in get_study_cards(self.user.id, category.pk)]
+
+    def test_deck_is_cached(self):
+        self.assertEqual(self.questions(self.net), ['Q'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.questions(self.net), ['Q'])
+
+    def test_edit_invalidates(self):
+        self.questions(self.net)
+        self.card.question = 'Q2'
+        self.card.save()
+        self.assertEqual(self.questions(self.net), ['Q2'])
+
+    def test_moving_card_invalidates_both_decks(self):
+        self.assertEqual((self.questions(self.net), self.questions(self.ops)), (['Q'], []))
+        self.client.force_login(self.user)
+        self.client.post(f'/{self.card.pk}/edit/', {
+            'question': 'Q', 'answer': 'A', 'category_name': 'Ops',
+        })
+        self.assertEqual((self.questions(self.net), self.questions(self.ops)), ([], ['Q']))
+
+
+class ProcessPdfTests(TestCase):
+    CARDS = [{'question': 'What is Docker?', 'answer': 'A container runtime', 'option_a': 'x',
+              'option_b': 'y', 'option_c': 'z', 'option_d': 'w', 'correct_option': 'A'}]
+    TEXT = ' '.join(['word'] * 30)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.user = User.objects.create_user('alice', password='pw')
+        self.pdf = PDFDocument(title='doc', user=self.user)
+        self.pdf.pdf_file.save('doc.pdf', ContentFile(b'%PDF-1.4'))
+
+    def run_task(self, text, cards=None, error=None):
+        generate = mock.Mock(return_value=cards, side_effect=error)
+        with mock.patch('FlashAI.tasks.extract_text_from_pdf', return_value=text), \
+                mock.patch('FlashAI.tasks.generate_flashcards_with_ai', generate):
+            status = process_pdf(self.pdf.pk, 'Ops')
+        self.pdf.refresh_from_db()
+        return status, generate
+
+    def test_done(self):
+        status, _ = self.run_task(self.TEXT, self.CARDS)
+        self.assertEqual((status, self.pdf.status), ('done', 'done'))
+        card = Flashcard.objects.get(user=self.user)
+        self.assertEqual((card.category.name, card.category_name_cached), ('Ops', 'Ops'))
+
+    def test_bulk_create_invalidates_cached_count(self):
+        use_shared_cache(self)
+        self.assertEqual(get_user_flashcard_count(self.user.id), 0)
+        self.run_task(self.TEXT, self.CARDS)
+        self.assertEqual(get_user_flashcard_count(self.user.id), 1)
+
+    def test_bulk_create_invalidates_cached_deck(self):
+        use_shared_cache(self)
+        category = Category.objects.create(name='Ops', user=self.user)
+        self.assertEqual(get_study_cards(self.user.id, category.pk), [])
+        self.run_task(self.TEXT, self.CARDS)
+        self.assertEqual(len(get_study_cards(self.user.id, category.pk)), 1)
+
+    def test_empty_text_skips_generation(self):
+        status, generate = self.run_task('too few words')
+        self.assertEqual((status, self.pdf.status), ('empty', 'empty'))
+        generate.assert_not_called()
+        self.assertFalse(Flashcard.objects.exists())
+
+    def test_failed(self):
+        with self.assertLogs('FlashAI.tasks', 'ERROR'):
+            status, _ = self.run_task(self.TEXT, error=RuntimeError('boom'))
+        self.assertEqual((status, self.pdf.status), ('failed', 'failed'))
+        self.assertFalse(Flashcard.objects.exists())
+
+    def test_failed_document_can_be_retried(self):
+        with self.assertLogs('FlashAI.tasks', 'ERROR'):
+            self.run_task(self.TEXT, error=RuntimeError('boom'))
+        status, _ = self.run_task(self.TEXT, self.CARDS)
+        self.assertEqual(status, 'done')
+        self.assertEqual(Flashcard.objects.count(), 1)
+
+    def test_redelivery_does_not_build_twice(self):
+        self.run_task(self.TEXT, self.CARDS)
+        status, generate = self.run_task(self.TEXT, self.CARDS)
+        self.assertEqual(status, 'done')
+        generate.assert_not_called()
+        self.assertEqual(Flashcard.objects.count(), 1)
+
+    def test_document_already_processing_is_not_claimed(self):
+        PDFDocument.objects.filter(pk=self.pdf.pk).update(status='processing')
+        status, generate = self.run_task(self.TEXT, self.CARDS)
+        self.assertEqual(status, 'processing')
+        generate.assert_not_called()
+
+
+@mock.patch.object(utils, 'pdfium', None)
+class DrawingOperatorFilterTests(TestCase):
+    def filtered(self, content):
+        page = PyPDF2.PdfReader(make_pdf(content)).pages[0]
+        utils._strip_drawing_operators(page)
+        return page['/Contents'].get_object().get_data()
+
+    def test_drawing_only_lines_are_dropped(self):
+        content = b'0 0 1 rg\n10 10 50 50 re\nf\nBT\n/F1 12 Tf\n1 w\n(Hello world) Tj\nET'
+        self.assertEqual(self.filtered(content), b'BT\n/F1 12 Tf\n(Hello world) Tj\nET')
+        self.assertEqual(utils.extract_text_from_pdf(make_pdf(content)), 'Hello world')
+
+    def test_operands_wrapped_from_earlier_line_keep_their_operator(self):
+        content = b'BT\n0.2 0.4\n0.6 rg\n/F1 12 Tf\n10 10 Td\n(Hello world) Tj\nET'
+        self.assertEqual(self.filtered(content), content)
+        self.assertEqual(utils.extract_text_from_pdf(make_pdf(content)), 'Hello world')
+
+    def test_multiline_string_is_left_unfiltered(self):
+        content = b'BT\n/F1 12 Tf\n10 10 Td\n(Hello\n1 w\nworld) Tj\nET'
+        self.assertEqual(self.filtered(content), content)
+        self.assertEqual(utils.extract_text_from_pdf(make_pdf(content)), 'Hello\n1 w\nworld')
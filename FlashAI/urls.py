@@ -12,6 +12,7 @@ urlpatterns = [
     path('<int:pk>/edit/', views.flashcard_update, name='flashcard_update'),
     path('<int:pk>/delete/', views.flashcard_delete, name='flashcard_delete'),
     path('api/flashcard_count/', views.api_flashcard_count, name='api_flashcard_count'),
+    path('api/pdf_status/<int:pk>/', views.api_pdf_status, name='api_pdf_status'),
     path('flashcards/study/', views.study_flashcards, name='study_flashcards'),
      
 ]
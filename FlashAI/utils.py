@@ -1,13 +1,26 @@
 """Utility helpers for PDF text extraction and AI flashcard generation.
 
+Text extraction prefers pypdfium2 (PDFium, C++) and falls back to the
+pure-Python PyPDF2 reader when pypdfium2 is not installed.
+
 The AI generation attempts to use the Bytez SDK if available and an API key
 is configured (env var BYTEZ_API_KEY). If that fails, a deterministic fallback
 heuristic creates simple flashcards by splitting the text into sentences.
 """
 
+import hashlib
 import json
+import logging
+import os
 import re
 import random
+import threading
+from itertools import islice
+
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
 
 try:
     import PyPDF2
@@ -25,44 +38,377 @@ try:
 except Exception:
     settings = None
 
+try:
+    from django.core.cache import cache
+except Exception:
+    cache = None
+
+
 try:
     from bytez import Bytez 
 except Exception: 
     Bytez = None
 
+logger = logging.getLogger(__name__)
+
+# Private generator for option shuffling; seed it for reproducible cards
+_rng = random.Random()
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except Exception:
+    _json_loads = json.loads
+
+
+_WS_RE = re.compile(r'\s+')
+# Characters that matter when locating bracketed arrays in model output
+_JSON_STRUCT_RE = re.compile(r'[\[\]"\\]')
+_JSON_BRACE_RE = re.compile(r'[{}"\\]')
+
+
+def _ci(word):
+    """Spell ``word`` as per-letter ``[Xx]`` classes so a pattern needs no re.I."""
+    return ''.join(f'[{c.upper()}{c.lower()}]' if c.isalpha() else c for c in word)
+
+
+# Definition-style sentence matchers used by the fallback generator. The
+# alternatives are tried in order ("Term: ...", "X is ...", "X are ...",
+# "X means/refers to/stands for/is defined as ...") in a single match call;
+# the named group that participated tells derive_qa which form was found.
+# Only the keywords are case-insensitive, so they are spelled with _ci
+# instead of compiling the whole pattern with re.I.
+_LEAD_IN = rf'(?:{_ci("In")}\s+[^,]+,\s*)?'
+_ARTICLE = rf'(?:{_ci("The")}\s+|{_ci("An")}\s+|{_ci("A")}\s+)?'
+_COLON_DEF = r'\s*(?P<colon_subj>[^:\-]{2,80})\s*[:\-]\s+(?P<colon_rest>.+)$'
+_IS_DEF = rf'\s*{_LEAD_IN}{_ARTICLE}(?P<is_subj>[^.!?]{{2,80}}?)\s+{_ci("is")}\s+(?P<is_pred>.+)$'
+_ARE_DEF = rf'\s*{_LEAD_IN}{_ARTICLE}(?P<are_subj>[^.!?]{{2,80}}?)\s+{_ci("are")}\s+(?P<are_pred>.+)$'
+_MEANS_VERBS = '|'.join(_ci(v) for v in ('means', 'refers to', 'stands for', 'is defined as'))
+_MEANS_DEF = rf'\s*{_ARTICLE}(?P<means_subj>[^.!?]{{2,80}}?)\s+(?P<means_verb>{_MEANS_VERBS})\s+(?P<means_rest>.+)$'
+_DEFINITION_RE = re.compile(f'^(?:{_COLON_DEF}|{_IS_DEF}|{_ARE_DEF}|{_MEANS_DEF})')
+# Same without the colon form, for when a "Term:" subject normalises to nothing
+_DEFINITION_NO_COLON_RE = re.compile(f'^(?:{_IS_DEF}|{_ARE_DEF}|{_MEANS_DEF})')
+_PLURAL_HINT_RE = re.compile(r'\b(s|S)\b$|\band\b')
+_LEAD_CTX_RE = re.compile(
+    '^(?:' + '|'.join(_ci(w) for w in ('In', 'On', 'At', 'During', 'Within', 'From')) + r')\s+[^,]{1,80},\s*'
+)
+_ARTICLE_RE = re.compile(rf'^(?:{_ci("a")}{_ci("n")}?|{_ci("the")})\s+')
+_WORDS_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?")
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+_CLAUSE_SPLIT_RE = re.compile(r'[.;\n]')
+# Candidate distractor words of at least 3 / 4 letters
+_WORD_RE3 = re.compile(r'\b[A-Za-z][A-Za-z\-]{2,}\b')
+_WORD_RE4 = re.compile(r'\b[A-Za-z][A-Za-z\-]{3,}\b')
+
+
+AI_MODEL = "Qwen/Qwen3-4B-Instruct-2507"
+# Generated cards for identical input text are reused for this long; the
+# cache key pins model and prompt, so entries never go stale, only cold.
+AI_RESULT_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
+# Static part of the generation prompt; only the text excerpt varies per call
+_PROMPT_HEAD = (
+    "Generate exactly 3 study flashcards as a JSON array, nothing else. "
+    "Each flashcard MUST be a multiple-choice question with these exact keys: "
+    "'question', 'answer', 'option_a', 'option_b', 'option_c', 'option_d', and 'correct_option' (one of A, B, C, D). "
+    "'question' is the question text, 'answer' is a brief explanation of why the correct option is right, "
+    "options are the four choices (with one correct and three plausible distractors), and 'correct_option' is the letter (A, B, C, or D) of the right answer. "
+    "Example: {\"question\": \"The server in a REST API hosts the data or functionality?\", \"answer\": \"The server hosts functionality and provides access to resources through endpoints.\", \"option_a\": \"Data\", \"option_b\": \"Functionality\", \"option_c\": \"Network\", \"option_d\": \"Protocol\", \"correct_option\": \"B\"}. "
+    "Output ONLY a valid JSON array starting with '[' and ending with ']'. "
+    "Do NOT include any explanation, markdown, code blocks, or reasoning. "
+    "Text: "
+)
+
+# Part of the AI result cache key: editing the prompt invalidates old cards
+_PROMPT_VERSION = hashlib.blake2b(_PROMPT_HEAD.encode('utf-8'), digest_size=4).hexdigest()
+
+# Only the start of a document feeds the prompt (1000 chars) and the fallback
+# heuristics, so generation never cleans more than this much text.
+GENERATION_TEXT_CHARS = 4000
+
 
 def clean_text(text):
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     return text.strip()
 
 
+def text_digest(text):
+    """Short content hash for cache keys."""
+    return hashlib.blake2b(text.encode('utf-8', 'replace'), digest_size=16).hexdigest()
+
+
+def _cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        # No Django cache configured (e.g. utils used outside the project)
+        return None
+
+
+def _cache_set(key, value, timeout):
+    try:
+        cache.set(key, value, timeout)
+    except Exception:
+        pass
+
+
+def clean_text_prefix(text, size):
+    """Return at least ``size`` chars of clean_text(text) when available.
+
+    Cleans a growing raw prefix instead of the whole document; the result is
+    a prefix of clean_text(text) except possibly for its final word.
+    """
+    window = size
+    while True:
+        cleaned = clean_text(text[:window])
+        if len(cleaned) >= size or window >= len(text):
+            return cleaned
+        window *= 2
+
+
+# Upper bounds on untrusted uploads, so a hostile PDF (huge declared streams,
+# thousands of pages) cannot exhaust worker memory during extraction.
+_MAX_PDF_BYTES = 25_000_000
+_MAX_PAGES = 500
+_MAX_EXTRACTED_CHARS = 2_000_000
+# A content-stream line made only of numeric operands and drawing operators
+# never shows text, so it can be dropped before PyPDF2 tokenises the stream:
+#   path construction/painting: m l c v y h re, f F f* S s B B* b b* n, W W*
+#   colour and stroke state:    rg RG g G k K, w J j M i
+# Text operators (BT ET Tf Td TD Tm T* Tj TJ ' ") and q Q cm (which move
+# text) are kept. Add operators here if a PDF turns up other text-free ops
+# that dominate its streams. The filter is line-based and does not parse
+# strings: streams with a ( ... ) literal spanning lines are left unfiltered
+# (_has_multiline_string), and <hex> strings are assumed to fit on one line.
+# Operands may wrap onto earlier lines ("0.2 0.4\n0.6 rg"), so a line is only
+# dropped when the token before it is an operator (_operands_pending).
+_DRAWING_ONLY_LINE_RE = re.compile(
+    rb'^[ \t]*(?:(?:[-+.\d]+[ \t]+)*(?:re|rg|RG|[mlcvyhfFSsnBbWgGkKwJjMi]\*?)(?=\s)[ \t]*)+(?:\r\n|\r|\n)',
+    re.M,
+)
+# Backslash escapes, string delimiters and line breaks in a content stream
+_STRING_SCAN_RE = re.compile(rb'\\[^\r\n]|[()\r\n]')
+_PDF_WHITESPACE = frozenset(b' \t\r\n\f\x00')
+# Whitespace and delimiters, i.e. the bytes that end a bare token
+_PDF_TOKEN_END = _PDF_WHITESPACE | frozenset(b'()<>[]{}/%')
+_PDF_NUMBER_RE = re.compile(rb'[-+]?(?:\d+\.?\d*|\.\d+)')
+
+
+# PDFium is not thread-safe and pypdfium2 does not serialise calls into it.
+# Without Celery, extraction runs in the request thread, so concurrent uploads
+# on a threaded server would otherwise enter PDFium at the same time.
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _extract_text_pdfium(pdf_file):
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_file)
+        try:
+            n_pages = len(pdf)
+            if n_pages > _MAX_PAGES:
+                logger.warning("PDF rejected: %d pages exceeds limit of %d", n_pages, _MAX_PAGES)
+                return ""
+            parts = []
+            total = 0
+            for i in range(n_pages):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+                parts.append(page_text)
+                total += len(page_text)
+                if total > _MAX_EXTRACTED_CHARS:
+                    break
+            return "\n".join(parts)
+        finally:
+            pdf.close()
+
+
+def _has_multiline_string(data):
+    """True if a ``( ... )`` string literal in a content stream spans a line break."""
+    depth = 0
+    for m in _STRING_SCAN_RE.finditer(data):
+        tok = m.group()
+        if tok == b'(':
+            depth += 1
+        elif tok == b')':
+            if depth:
+                depth -= 1
+        elif depth and tok in (b'\n', b'\r'):
+            return True
+    return False
+
+
+def _operands_pending(data, pos):
+    """True if the token before ``pos`` in a content stream is an operand.
+
+    An operator takes every operand since the previous operator, including
+    ones on earlier lines, so a line that would consume them must be kept.
+    """
+    i = pos - 1
+    while i >= 0 and data[i] in _PDF_WHITESPACE:
+        i -= 1
+    if i < 0:
+        return False
+    if data[i] in _PDF_TOKEN_END:
+        # End of a string, array, dict or hex string (or an open one)
+        return True
+    j = i
+    while j >= 0 and data[j] not in _PDF_TOKEN_END:
+        j -= 1
+    if j >= 0 and data[j] == ord('/'):
+        return True
+    token = data[j + 1:i + 1]
+    return token in (b'true', b'false', b'null') or _PDF_NUMBER_RE.fullmatch(token) is not None
+
+
+def _drop_drawing_line(m):
+    return m.group() if _operands_pending(m.string, m.start()) else b''
+
+
+def _strip_drawing_operators(page):
+    """Replace a PyPDF2 page's content stream with its text-relevant lines."""
+    contents = page.get('/Contents')
+    if contents is None:
+        return
+    try:
+        contents = contents.get_object()
+        if isinstance(contents, PyPDF2.generic.ArrayObject):
+            data = b'\n'.join(part.get_object().get_data() for part in contents)
+        else:
+            data = contents.get_data()
+    except Exception:
+        # Unreadable here means PyPDF2 will report it; extract unfiltered
+        return
+    # Inline image data is binary and may contain anything; leave it alone
+    if b'BI' in data:
+        return
+    # A line inside a multi-line string literal is text, whatever it looks like
+    if _has_multiline_string(data):
+        return
+    filtered = _DRAWING_ONLY_LINE_RE.sub(_drop_drawing_line, data)
+    if len(filtered) != len(data):
+        stream = PyPDF2.generic.DecodedStreamObject()
+        stream.set_data(filtered)
+        page[PyPDF2.generic.NameObject('/Contents')] = stream
+
+
 def extract_text_from_pdf(pdf_file):
-    """Extract raw text from a PDF file-like object.
+    """Extract raw text from a PDF file-like object or filesystem path.
 
-    Accepts an uploaded file or opened FileField. Returns empty string if
-    PyPDF2 is unavailable or parsing fails.
+    Accepts an uploaded file, an opened FileField, or a path (which lets
+    PDFium read the file natively instead of through Python ``read()``
+    calls). Returns empty string if no PDF backend is available, parsing
+    fails, or the file exceeds the size/page limits; extraction stops early
+    once enough text is collected.
     """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        try:
+            size = os.path.getsize(pdf_file)
+        except OSError as e:
+            logger.warning("PDF extraction error: %s", e)
+            return ""
+    else:
+        size = getattr(pdf_file, 'size', None) or 0
+    if size > _MAX_PDF_BYTES:
+        logger.warning("PDF rejected: %d bytes exceeds limit of %d", size, _MAX_PDF_BYTES)
+        return ""
+    if pdfium:
+        try:
+            return _extract_text_pdfium(pdf_file)
+        except Exception as e:
+            logger.warning("PDF extraction error: %s", e)
+            return ""
     if not PyPDF2:
         return ""
-    text = ""
+    parts = []
+    total = 0
     try:
         pdf_reader = PyPDF2.PdfReader(pdf_file)
+        if len(pdf_reader.pages) > _MAX_PAGES:
+            logger.warning("PDF rejected: %d pages exceeds limit of %d", len(pdf_reader.pages), _MAX_PAGES)
+            return ""
         for page in pdf_reader.pages:
+            _strip_drawing_operators(page)
             page_text = page.extract_text()
             if page_text:
-                text += page_text
+                parts.append(page_text)
+                total += len(page_text)
+                if total > _MAX_EXTRACTED_CHARS:
+                    break
     except Exception as e: 
-        print("PDF extraction error:", e)
+        logger.warning("PDF extraction error: %s", e)
         return ""
-    return text
+    return "".join(parts)
+
+
+def _last_balanced_array_span(text):
+    """Return (start, end) of the last complete top-level ``[...]`` in text.
+
+    Single linear pass: brackets are depth-counted, and inside an array
+    double-quoted strings (with backslash escapes) are skipped so brackets in
+    string values do not count. Stray ``]`` outside an array are ignored.
+    """
+    depth = 0
+    start = -1
+    span = None
+    in_string = False
+    skip = -1
+    for m in _JSON_STRUCT_RE.finditer(text):
+        i = m.start()
+        if i == skip:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == '\\':
+                skip = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '[':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == ']':
+            if depth:
+                depth -= 1
+                if depth == 0:
+                    span = (start, i + 1)
+        elif ch == '"' and depth:
+            in_string = True
+    return span
+
+
+def _unclosed_braces(text):
+    """Count '{' still open at the end of text, ignoring braces in strings."""
+    depth = 0
+    in_string = False
+    skip = -1
+    for m in _JSON_BRACE_RE.finditer(text):
+        i = m.start()
+        if i == skip:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == '\\':
+                skip = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}' and depth:
+            depth -= 1
+    return depth
 
 
 def extract_last_json_array(text):
     if not text:
         return None
     # Prefer the last bracketed array; tolerate leading/trailing noise
-    matches = re.findall(r'\[[\s\S]*?\]', text)
-    js = matches[-1] if matches else None
+    span = _last_balanced_array_span(text)
+    js = text[span[0]:span[1]] if span else None
     if js:
         s = js.strip()
         # Remove common markdown wrappers
@@ -76,11 +422,7 @@ def extract_last_json_array(text):
         # If there is no closing bracket, attempt to auto-complete
         if ']' not in candidate:
             # Balance curly braces inside array
-            open_obj = candidate.count('{')
-            close_obj = candidate.count('}')
-            if close_obj < open_obj:
-                candidate += '}' * (open_obj - close_obj)
-            candidate += ']'
+            candidate += '}' * _unclosed_braces(candidate) + ']'
         # Trim trailing junk after the last probable object end
         # Heuristic: keep until last '}' before final ']'
         last_obj_end = candidate.rfind('}')
@@ -88,7 +430,7 @@ def extract_last_json_array(text):
             # Ensure candidate ends with ']' only once
             tail = candidate[last_obj_end+1:]
             # Remove extraneous characters between last object and closing bracket
-            tail = re.sub(r'[^\]]+', '', tail)
+            tail = ']' * tail.count(']')
             candidate = candidate[:last_obj_end+1] + tail
         salvaged = candidate.strip()
         return salvaged if salvaged.startswith('[') else None
@@ -105,7 +447,7 @@ def try_json_loads(s):
         s = s.strip('`').strip()
     # Ensure it looks like an array; otherwise, attempt object parse
     try:
-        return json.loads(s)
+        return _json_loads(s)
     except Exception:
         return None
 
@@ -122,54 +464,77 @@ def parse_json_array_lenient(s):
     start = s.find('[')
     if start == -1:
         return None
-    # Prefer up to the last closing bracket if present, else to the end
+    # Prefer up to the last closing bracket if present, else to the end.
+    # Decode in place from offsets rather than copying the array body out.
     end = s.rfind(']')
-    inner = s[start+1:end] if end != -1 else s[start+1:]
+    if end == -1:
+        end = len(s)
     dec = json.JSONDecoder()
-    pos = 0
+    pos = start + 1
     items = []
-    length = len(inner)
-    while pos < length:
+    while pos < end:
         # Skip whitespace and commas
-        while pos < length and inner[pos] in ' \t\r\n,':
+        while pos < end and s[pos] in ' \t\r\n,':
             pos += 1
-        if pos >= length:
+        if pos >= end:
             break
         try:
-            obj, nxt = dec.raw_decode(inner, pos)
-            items.append(obj)
-            pos = nxt
+            obj, nxt = dec.raw_decode(s, pos)
         except Exception:
             # Stop at first incomplete/invalid object
             break
+        if nxt > end:
+            # Object only completes past the array bound; it was cut off there
+            break
+        items.append(obj)
+        pos = nxt
         # Skip trailing spaces/commas before next object
-        while pos < length and inner[pos] in ' \t\r\n,':
+        while pos < end and s[pos] in ' \t\r\n,':
             pos += 1
     return items if items else None
 
 
+def _iter_sentences(text):
+    """Lazily yield the same pieces as ``_SENT_SPLIT_RE.split(text)``."""
+    prev = 0
+    for m in _SENT_SPLIT_RE.finditer(text):
+        yield text[prev:m.start()]
+        prev = m.end()
+    yield text[prev:]
+
+
+def _unique_words(pattern, text, limit, avoid=''):
+    """First ``limit`` distinct words matched by ``pattern``, capitalised.
+
+    Words are compared case-insensitively; any word that occurs inside
+    ``avoid`` (including as a stem, e.g. "machine" in "machines") is skipped.
+    Stops scanning ``text`` as soon as enough are found.
+    """
+    avoid = avoid.lower()
+    found = {}
+    for m in pattern.finditer(text):
+        lw = m.group(0).lower()
+        if lw not in found and lw not in avoid:
+            found[lw] = lw.capitalize()
+            if len(found) >= limit:
+                break
+    return list(found.values())
+
+
 def assign_options_random(correct, wrongs):
-    wrongs = [w for w in wrongs if w and str(w).strip()]
-    # Ensure exactly 3 wrongs
-    pool = list(map(str, wrongs))
-    while len(pool) < 3:
-        pool.append("Option")
-    pool = pool[:3]
-    slots = [None, None, None, None]
-    correct_idx = random.randint(0, 3)
-    slots[correct_idx] = str(correct)
-    wi = 0
-    for i in range(4):
-        if slots[i] is None:
-            slots[i] = pool[wi]
-            wi += 1
-    letters = ['A', 'B', 'C', 'D']
+    # Exactly 3 non-blank wrongs, padded with a placeholder when short
+    pool = [str(w) for w in wrongs if w and str(w).strip()][:3]
+    if len(pool) < 3:
+        pool += ["Option"] * (3 - len(pool))
+    correct_idx = _rng.randrange(4)
+    # Wrongs keep their order around the correct answer's slot
+    pool.insert(correct_idx, str(correct))
     return {
-        'option_a': slots[0],
-        'option_b': slots[1],
-        'option_c': slots[2],
-        'option_d': slots[3],
-        'correct_option': letters[correct_idx]
+        'option_a': pool[0],
+        'option_b': pool[1],
+        'option_c': pool[2],
+        'option_d': pool[3],
+        'correct_option': 'ABCD'[correct_idx]
     }
 
 def _fallback_flashcards(cleaned_text, limit=3):
@@ -181,8 +546,8 @@ def _fallback_flashcards(cleaned_text, limit=3):
 
     def normalize_subject(subj: str) -> str:
         subj = subj.strip().strip(' .,:;\t\n\r')
-        subj = re.sub(r'^(?:In|On|At|During|Within|From)\s+[^,]+,\s*', '', subj, flags=re.I)
-        subj = re.sub(r'^(?:an?|the)\s+', '', subj, flags=re.I)
+        subj = _LEAD_CTX_RE.sub('', subj, count=1)
+        subj = _ARTICLE_RE.sub('', subj, count=1)
         if len(subj) <= 60:
             subj = subj[0:1].upper() + subj[1:]
         return subj
@@ -191,34 +556,32 @@ def _fallback_flashcards(cleaned_text, limit=3):
         s = sentence.strip()
         if len(s) < 10:
             return None
-        m = re.match(r'^\s*([^:\-]{2,80})\s*[:\-]\s+(.+)$', s)
-        if m:
-            subj, rest = m.group(1), m.group(2)
-            subj = normalize_subject(subj)
+        m = _DEFINITION_RE.match(s)
+        if m and m.lastgroup == 'colon_rest':
+            subj = normalize_subject(m.group('colon_subj'))
             if subj:
-                qverb = 'are' if re.search(r'\b(s|S)\b$|\band\b', subj) or subj.lower().endswith('s') else 'is'
+                rest = m.group('colon_rest')
+                qverb = 'are' if _PLURAL_HINT_RE.search(subj) or subj.lower().endswith('s') else 'is'
                 question = f"What {qverb} {subj}?"
                 answer = (f"{subj} {qverb} " + rest).strip()
                 return question[:120], answer[:300]
+            m = _DEFINITION_NO_COLON_RE.match(s)
 
-        m = re.match(r'^\s*(?:In\s+[^,]+,\s*)?(?:The\s+|An\s+|A\s+)?([^.!?]{2,80}?)\s+is\s+(.+)$', s, flags=re.I)
-        if m:
-            subj, pred = m.group(1), m.group(2)
+        if m and m.lastgroup == 'is_pred':
+            subj, pred = m.group('is_subj'), m.group('is_pred')
             subj = normalize_subject(subj)
             question = f"What is {subj}?"
             answer = f"{subj} is {pred}"
             return question[:120], answer[:300]
-        m = re.match(r'^\s*(?:In\s+[^,]+,\s*)?(?:The\s+|An\s+|A\s+)?([^.!?]{2,80}?)\s+are\s+(.+)$', s, flags=re.I)
-        if m:
-            subj, pred = m.group(1), m.group(2)
+        if m and m.lastgroup == 'are_pred':
+            subj, pred = m.group('are_subj'), m.group('are_pred')
             subj = normalize_subject(subj)
             question = f"What are {subj}?"
             answer = f"{subj} are {pred}"
             return question[:120], answer[:300]
 
-        m = re.match(r'^\s*(?:The\s+|An\s+|A\s+)?([^.!?]{2,80}?)\s+(means|refers to|stands for|is defined as)\s+(.+)$', s, flags=re.I)
-        if m:
-            subj, verb, rest = m.group(1), m.group(2).lower(), m.group(3)
+        if m and m.lastgroup == 'means_rest':
+            subj, verb, rest = m.group('means_subj'), m.group('means_verb').lower(), m.group('means_rest')
             subj = normalize_subject(subj)
             if verb == 'means' or verb == 'refers to' or verb == 'is defined as':
                 question = f"What is {subj}?"
@@ -228,7 +591,7 @@ def _fallback_flashcards(cleaned_text, limit=3):
                 answer = f"{subj} stands for {rest}"
             return question[:120], answer[:300]
 
-        words = re.findall(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?", s)
+        words = _WORDS_RE.findall(s)
         topic = ' '.join(words[:5]) if words else 'this topic'
         topic = normalize_subject(topic)
         qverb = 'are' if topic.endswith('s') else 'is'
@@ -236,9 +599,10 @@ def _fallback_flashcards(cleaned_text, limit=3):
         answer = s
         return question[:120], answer[:300]
 
-    sentences = re.split(r'[.!?]\s+', cleaned_text)
+    # Distractor candidates depend only on the document, so scan it once
+    words = _WORD_RE3.findall(cleaned_text)
     cards = []
-    for s in sentences:
+    for s in _iter_sentences(cleaned_text):
         if len(cards) >= limit:
             break
         qa = derive_qa(s)
@@ -247,9 +611,12 @@ def _fallback_flashcards(cleaned_text, limit=3):
         q, a = qa
         if q and a:
             # Synthesize lightweight MCQ options
-            correct = re.split(r'[.;\n]', a)[0][:60]
-            words = re.findall(r'\b[A-Za-z][A-Za-z\-]{2,}\b', cleaned_text)
-            distractor_pool = [w.capitalize() for w in words if w.lower() not in correct.lower()][:6] or [
+            correct = _CLAUSE_SPLIT_RE.split(a, 1)[0][:60]
+            # Substring test so inflections of the answer's words are skipped too
+            correct_lower = correct.lower()
+            distractor_pool = list(islice(
+                (w.capitalize() for w in words if w.lower() not in correct_lower), 6
+            )) or [
                 "Concept", "Process", "Component", "Protocol", "Dataset", "Method"
             ]
             correct_text = correct or "Correct answer"
@@ -262,17 +629,9 @@ def _fallback_flashcards(cleaned_text, limit=3):
             cards.append(card)
     # If we could not reach the requested limit, add generic MCQs to fill
     if len(cards) < limit:
+        unique = _unique_words(_WORD_RE4, cleaned_text, 6)
+
         def synthesize_generic(idx: int):
-            words = re.findall(r'\b[A-Za-z][A-Za-z\-]{3,}\b', cleaned_text)
-            unique = []
-            seen = set()
-            for w in words:
-                lw = w.lower()
-                if lw not in seen:
-                    seen.add(lw)
-                    unique.append(w.capitalize())
-                if len(unique) >= 6:
-                    break
             pool = unique or ["Concept", "Process", "Component", "Protocol", "Dataset", "Method"]
             correct = (unique[0] if unique else "Key concept") + " from the text"
             # Build three wrongs from pool in a rolling fashion
@@ -295,7 +654,7 @@ def generate_flashcards_with_ai(text):
 
     Returns list of dicts: [{question: str, answer: str}, ...]
     """
-    cleaned_text = clean_text(text)
+    cleaned_text = clean_text_prefix(text or '', GENERATION_TEXT_CHARS)
     if not cleaned_text:
         return []
 
@@ -304,40 +663,36 @@ def generate_flashcards_with_ai(text):
         getattr(settings, 'BYTEZ_API_KEY', None) if settings else None
     )
     if not (api_key and Bytez):
-        print("AI disabled or missing key/SDK; using fallback (synthetic MCQs).")
+        logger.debug("AI disabled or missing key/SDK; using fallback (synthetic MCQs).")
         if not api_key:
-            print("BYTEZ_API_KEY not found via decouple or settings.")
+            logger.debug("BYTEZ_API_KEY not found via decouple or settings.")
         if not Bytez:
-            print("Bytez SDK not installed. Add 'bytez' to requirements.txt and install.")
+            logger.debug("Bytez SDK not installed. Add 'bytez' to requirements.txt and install.")
         return _fallback_flashcards(cleaned_text)
     else:
-        print("AI enabled: BYTEZ_API_KEY detected and Bytez SDK available.")
+        logger.debug("AI enabled: BYTEZ_API_KEY detected and Bytez SDK available.")
+
+    # Only successful AI output is cached; fallback cards are cheap to rebuild
+    # and caching them would hide a recovered API for the whole timeout.
+    cache_key = f'flashcards:{AI_MODEL}:{_PROMPT_VERSION}:{text_digest(cleaned_text)}'
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        logger.debug("Using cached AI flashcards for %s", cache_key)
+        return cached
 
     try:
         sdk = Bytez(api_key)
-        model = sdk.model("Qwen/Qwen3-4B-Instruct-2507")
-        prompt = (
-            "Generate exactly 3 study flashcards as a JSON array, nothing else. "
-            "Each flashcard MUST be a multiple-choice question with these exact keys: "
-            "'question', 'answer', 'option_a', 'option_b', 'option_c', 'option_d', and 'correct_option' (one of A, B, C, D). "
-            "'question' is the question text, 'answer' is a brief explanation of why the correct option is right, "
-            "options are the four choices (with one correct and three plausible distractors), and 'correct_option' is the letter (A, B, C, or D) of the right answer. "
-            "Example: {\"question\": \"The server in a REST API hosts the data or functionality?\", \"answer\": \"The server hosts functionality and provides access to resources through endpoints.\", \"option_a\": \"Data\", \"option_b\": \"Functionality\", \"option_c\": \"Network\", \"option_d\": \"Protocol\", \"correct_option\": \"B\"}. "
-            "Output ONLY a valid JSON array starting with '[' and ending with ']'. "
-            "Do NOT include any explanation, markdown, code blocks, or reasoning. "
-            f"Text: {cleaned_text[:1000]}"
-        )
+        model = sdk.model(AI_MODEL)
+        prompt = _PROMPT_HEAD + cleaned_text[:1000]
         output = model.run([
             {"role": "user", "content": prompt}
         ])
         
-        print("=" * 80)
-        print("RAW AI RESPONSE:")
-        print(output)
-        print("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("RAW AI RESPONSE:\n%s", output)
         
         if hasattr(output, 'error') and output.error:
-            print("BYTEZ ERROR:", output.error)
+            logger.warning("Bytez error: %s", output.error)
             return _fallback_flashcards(cleaned_text)
         if hasattr(output, 'output') and isinstance(output.output, dict):
             content = output.output.get('content')
@@ -347,55 +702,43 @@ def generate_flashcards_with_ai(text):
             content = str(output)
         
         if not content:
-            print("WARNING: No content extracted from AI response")
+            logger.warning("No content extracted from AI response")
             return _fallback_flashcards(cleaned_text)
         
         json_string = extract_last_json_array(content)
         if not json_string:
-            print("WARNING: No JSON array found; attempting salvage")
+            logger.warning("No JSON array found in AI response; using fallback")
             # Salvage attempt already performed inside extract_last_json_array; if still None, fallback
             return _fallback_flashcards(cleaned_text)
         
-        print("EXTRACTED JSON STRING:")
-        print(json_string)
-        print("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("EXTRACTED JSON STRING:\n%s", json_string)
         
         flashcards = try_json_loads(json_string)
         if not isinstance(flashcards, list) or not flashcards:
             # Try lenient recovery from truncated arrays
             recovered = parse_json_array_lenient(json_string)
             if recovered:
-                print(f"LENIENT PARSE: recovered {len(recovered)} item(s) from truncated JSON array")
+                logger.debug("Lenient parse recovered %d item(s) from truncated JSON array", len(recovered))
                 flashcards = recovered
             else:
-                print("WARNING: JSON parsing failed or not a list; using fallback")
+                logger.warning("JSON parsing failed or not a list; using fallback")
                 return _fallback_flashcards(cleaned_text)
         
-        print("PARSED FLASHCARDS:")
-        for idx, c in enumerate(flashcards[:10]):
-            print(f"Card {idx + 1}:", c)
-        print("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            for idx, c in enumerate(flashcards[:10]):
+                logger.debug("Parsed card %d: %s", idx + 1, c)
         
         def _short_phrase(text: str) -> str:
             t = (text or '').strip()
             if not t:
                 return ''
-            t = re.split(r'[.;\n]', t)[0]
-            t = re.sub(r'\s+', ' ', t).strip()
+            t = _CLAUSE_SPLIT_RE.split(t, 1)[0]
+            t = _WS_RE.sub(' ', t).strip()
             return t[:60]
 
         def _distractors(source: str, avoid: str, k: int = 3):
-            words = re.findall(r'\b[A-Za-z][A-Za-z\-]{2,}\b', source)
-            uniq = []
-            seen = set()
-            for w in words:
-                lw = w.lower()
-                if lw not in seen and lw not in avoid.lower():
-                    seen.add(lw)
-                    uniq.append(w.capitalize())
-                if len(uniq) >= 12:
-                    break
-            pool = uniq or ["Concept", "Process", "Component", "Protocol", "Dataset", "Method", "Library", "Model"]
+            pool = _unique_words(_WORD_RE3, source, 12, avoid) or ["Concept", "Process", "Component", "Protocol", "Dataset", "Method", "Library", "Model"]
             out = []
             for i in range(k):
                 out.append(pool[i % len(pool)])
@@ -413,14 +756,14 @@ def generate_flashcards_with_ai(text):
                     card_data['option_c'] = str(c.get('option_c', ''))[:255]
                     card_data['option_d'] = str(c.get('option_d', ''))[:255]
                     card_data['correct_option'] = str(c.get('correct_option', ''))[:1].upper()
-                    print(f"MCQ DETECTED: {card_data['question'][:50]}... with options A-D")
+                    logger.debug("MCQ detected: %.50s... with options A-D", card_data['question'])
                 else:
                     # Synthesize MCQ options from Q/A when AI omits them
                     correct = _short_phrase(card_data['answer']) or _short_phrase(card_data['question']) or 'Correct answer'
                     wrongs = _distractors(cleaned_text, correct, 3)
                     opts = assign_options_random(correct, wrongs)
                     card_data.update(opts)
-                    print(f"SYNTHETIC MCQ: {card_data['question'][:50]}... (correct={card_data['correct_option']})")
+                    logger.debug("Synthetic MCQ: %.50s... (correct=%s)", card_data['question'], card_data['correct_option'])
                 valid.append(card_data)
         if not valid:
             return _fallback_flashcards(cleaned_text)
@@ -428,7 +771,8 @@ def generate_flashcards_with_ai(text):
         if len(valid) < 3:
             needed = 3 - len(valid)
             valid.extend(_fallback_flashcards(cleaned_text, limit=needed))
+        _cache_set(cache_key, valid, AI_RESULT_CACHE_TIMEOUT)
         return valid
     except Exception as e:
-        print("AI generation exception:", e)
+        logger.exception("AI generation failed: %s", e)
         return _fallback_flashcards(cleaned_text)
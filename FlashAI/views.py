@@ -1,93 +1,76 @@
-from datetime import timedelta
-from django.utils import timezone
 from .models import Flashcard, Category, PDFDocument
-from django.db.models import Q
-from .utils import extract_text_from_pdf, generate_flashcards_with_ai
+from django.db.models import Exists, OuterRef, Q
+from .caching import (
+    get_study_cards, get_user_flashcard_count, invalidate_study_cards,
+)
+from .tasks import enqueue_pdf
+from .pagination import decode_cursor, keyset_page
 from django.shortcuts import render, get_object_or_404, redirect
 from .forms import FlashcardForm, CategoryForm, PDFUploadForm
-from django.views.generic import TemplateView
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import JsonResponse
-from .models import Flashcard
+from functools import lru_cache
+from django.urls import reverse
 
+FLASHCARDS_PER_PAGE = 25
+RECENT_FLASHCARDS = 6
+RECENT_PDFS = 3
+
+
+@lru_cache(maxsize=None)
+def static_url(name):
+    """reverse() for argument-free URL names, resolved once per process."""
+    return reverse(name)
 
-@login_required(login_url='/account/login/')
-def home(request):
-    return render(request, 'home.html')
 
 @login_required(login_url='/account/login/')
 def upload_pdf(request):
-    """Handle PDF upload, extract text, generate AI flashcards, and persist.
+    """Handle PDF upload and hand it off for flashcard generation.
 
     Workflow:
       1. User uploads a PDF with a title and (optional) category string.
-      2. Save PDFDocument instance.
-      3. Extract text via PyPDF2 (if available).
-      4. Generate flashcards using AI or fallback heuristic.
-      5. Create Flashcard objects under chosen/created Category.
+      2. Save the PDFDocument.
+      3. ``tasks.enqueue_pdf`` extracts the text, generates flashcards (AI or
+         fallback heuristic) and bulk-creates them -- on a Celery worker when
+         one is configured, otherwise inline before redirecting. An inline
+         run that finds no text sends the user back here with a warning.
     """
     if request.method == 'POST':
         form = PDFUploadForm(request.POST, request.FILES)
         if form.is_valid():
+            category_name = request.POST.get('category') or 'Other'
             pdf_instance = form.save(commit=False)
             pdf_instance.user = request.user
             pdf_instance.save()
-            category_name = request.POST.get('category') or 'Other'
-            category_obj, _ = Category.objects.get_or_create(name=category_name, user=request.user)
-            pdf_file_field = pdf_instance.pdf_file
-            try:
-                pdf_file_field.open('rb')
-                extracted_text = extract_text_from_pdf(pdf_file_field)
-            finally:
-                try:
-                    pdf_file_field.close()
-                except Exception:
-                    pass
-
-            flashcards_data = generate_flashcards_with_ai(extracted_text)
-
-            for card in flashcards_data:
-                question = card.get('question', '').strip()[:255]
-                answer = card.get('answer', '').strip()
-                if question and answer:
-                    Flashcard.objects.create(
-                        question=question,
-                        answer=answer,
-                        category=category_obj,
-                        user=request.user,
-                        option_a=card.get('option_a', ''),
-                        option_b=card.get('option_b', ''),
-                        option_c=card.get('option_c', ''),
-                        option_d=card.get('option_d', ''),
-                        correct_option=card.get('correct_option', '')
-                    )
-            return redirect('flashcard_list')
+            if enqueue_pdf(pdf_instance.id, category_name) == 'empty':
+                messages.warning(request, 'No extractable text was found in that PDF, so no flashcards were created.')
+                return redirect(static_url('upload_pdf'))
+            return redirect(static_url('flashcard_list'))
     else:
         form = PDFUploadForm()
 
-    pdfs = PDFDocument.objects.filter(user=request.user).order_by('-uploaded_at')
+    # The upload page only shows the latest few documents
+    pdfs = PDFDocument.objects.filter(user=request.user).order_by('-uploaded_at')[:RECENT_PDFS]
     return render(request, 'upload_pdf.html', {
         'form': form,
         'pdf_list': pdfs,
     })
 
 
-class HomePageView(LoginRequiredMixin, TemplateView):
-    template_name = "home.html"
-    login_url = '/accounts/login/'
-    redirect_field_name = 'next'
-
 @login_required(login_url='/accounts/login/')
 def home(request):
     """Dashboard view: provide counts and recent flashcards.
 
     Adds recent_flashcards list limited to last 6 items for display in base template.
     """
-    flashcard_count = Flashcard.objects.filter(user=request.user).count()
-    recent_flashcards = Flashcard.objects.filter(user=request.user).order_by('-created_at')[:6]
+    recent_flashcards = (
+        Flashcard.objects.filter(user=request.user)
+        .only('id', 'question', 'created_at', 'category_name_cached')
+        .order_by('-created_at')[:RECENT_FLASHCARDS]
+    )
     return render(request, 'home.html', {
-        'flashcard_count': flashcard_count,
+        'flashcard_count': get_user_flashcard_count(request.user.id),
         'recent_flashcards': recent_flashcards,
     })
 
@@ -111,7 +94,7 @@ def create_flashcard(request):
                 correct_option=form.cleaned_data.get('correct_option','')
             )
             flashcard.save()
-            return redirect('flashcard_list')
+            return redirect(static_url('flashcard_list'))
     else:
         form = FlashcardForm()
 
@@ -127,13 +110,23 @@ def create_flashcard(request):
 
 @login_required(login_url='/account/login/')
 def flashcard_list(request):
-    flashcards = Flashcard.objects.filter(user=request.user)
-    return render(request, 'flashcard_list.html', {'flashcards': flashcards})
+    flashcards_qs = (
+        Flashcard.objects.filter(user=request.user)
+        .only('id', 'question', 'answer', 'created_at', 'category_name_cached')
+    )
+    cursor = request.GET.get('before')
+    flashcards, next_cursor = keyset_page(flashcards_qs, cursor, FLASHCARDS_PER_PAGE)
+    return render(request, 'flashcard_list.html', {
+        'flashcards': flashcards,
+        'next_cursor': next_cursor,
+        'is_first_page': decode_cursor(cursor) is None,
+    })
 
 
 @login_required(login_url='/account/login/')
 def flashcard_update(request, pk):
     flashcard = get_object_or_404(Flashcard, pk=pk, user=request.user)
+    old_category_id = flashcard.category_id
     form = FlashcardForm(request.POST or None, instance=flashcard)
     if form.is_valid():
         obj = form.save(commit=False)
@@ -142,7 +135,10 @@ def flashcard_update(request, pk):
             category, _ = Category.objects.get_or_create(name=category_name, user=request.user)
             obj.category = category
         obj.save()
-        return redirect('flashcard_list')
+        if obj.category_id != old_category_id:
+            # post_save only sees the new category; drop the old one's deck
+            invalidate_study_cards(request.user.id, old_category_id)
+        return redirect(static_url('flashcard_list'))
     return render(request, 'flashcards/flashcard_form.html', {'form': form})
 
 
@@ -151,7 +147,7 @@ def flashcard_delete(request, pk):
     flashcard = get_object_or_404(Flashcard, pk=pk, user=request.user)
     if request.method == 'POST':
         flashcard.delete()
-        return redirect('flashcard_list')
+        return redirect(static_url('flashcard_list'))
     return render(request, 'flashcards/flashcard_confirm_delete.html', {'flashcard': flashcard})
 
 @login_required(login_url='/account/login/')
@@ -159,10 +155,8 @@ def create_category(request):
     if request.method == "POST":
         form = CategoryForm(request.POST)
         if form.is_valid():
-            category = form.save(commit=False)
-            category.user = request.user
-            category.save()
-            return redirect('create_flashcard')
+            Category.objects.get_or_create(name=form.cleaned_data['name'], user=request.user)
+            return redirect(static_url('create_flashcard'))
     else:
         form = CategoryForm()
     categories = Category.objects.filter(user=request.user).order_by('name')
@@ -173,36 +167,34 @@ def delete_category(request, pk):
     category = get_object_or_404(Category, pk=pk, user=request.user)
     if request.method == 'POST':
         category.delete()
-    return redirect('create_category')
+    return redirect(static_url('create_category'))
 
 
 def api_flashcard_count(request):
-    count = Flashcard.objects.filter(user=request.user).count() if request.user.is_authenticated else 0
+    count = get_user_flashcard_count(request.user.id) if request.user.is_authenticated else 0
     return JsonResponse({'count': count})
 
 
+@login_required(login_url='/account/login/')
+def api_pdf_status(request, pk):
+    pdf = get_object_or_404(PDFDocument.objects.only('status'), pk=pk, user=request.user)
+    return JsonResponse({'status': pdf.status, 'label': pdf.get_status_display()})
+
+
 @login_required(login_url='/account/login/')
 def study_flashcards(request):
     selected_category_id = request.GET.get('category')
+    # Own categories, plus any legacy owner-less category holding this user's
+    # cards. EXISTS replaces the flashcard join + DISTINCT and is only probed
+    # for owner-less rows.
+    owns_cards = Flashcard.objects.filter(category=OuterRef('pk'), user=request.user)
     categories = Category.objects.filter(
-        Q(user=request.user) | Q(flashcard__user=request.user)
-    ).distinct().order_by('name')
-    if selected_category_id:
-        flashcards_qs = Flashcard.objects.filter(
-            category_id=selected_category_id, user=request.user)
+        Q(user=request.user) | (Q(user__isnull=True) & Q(Exists(owns_cards)))
+    ).order_by('name')
+    if selected_category_id and selected_category_id.isdigit():
+        flashcards = get_study_cards(request.user.id, int(selected_category_id))
     else:
-        flashcards_qs = Flashcard.objects.none()
-
-    flashcards = []
-    for f in flashcards_qs:
-        options = [f.option_a, f.option_b, f.option_c, f.option_d]
-        options = [o for o in options if o]
-        flashcards.append({
-            "question": f.question,
-            "answer": f.answer,
-            "options": options,
-            "correct": f.correct_option or ""
-        })
+        flashcards = []
 
     return render(request, 'flashcards/study.html', {
         'categories': categories,
@@ -0,0 +1,7 @@
+# Celery is optional; without it PDF uploads are processed in-request.
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
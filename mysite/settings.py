@@ -133,6 +133,49 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Always spool uploads to a temporary file on disk; FileSystemStorage then
+# moves it into MEDIA_ROOT instead of copying an in-memory buffer.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 0
+
+# Background jobs
+# Set CELERY_BROKER_URL (e.g. redis://localhost:6379/0) and CACHE_URL (below),
+# and run a Celery worker to process uploaded PDFs outside the request; without
+# both, uploads are processed inline.
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='')
+# PDF jobs are long and CPU-bound: hand a worker one job at a time.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Caches
+# Per-user counts and study decks are only cached in a backend shared by every
+# web and worker process; set CACHE_URL (e.g. redis://localhost:6379/1) to
+# enable it. Without it Django's per-process LocMemCache is used and FlashAI
+# reads those values straight from the database.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+    }
+
+# Logging
+# FlashAI's AI-pipeline diagnostics are debug-level; set FLASHAI_LOG_LEVEL=DEBUG
+# to see raw model responses and parsed cards.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'FlashAI': {
+            'handlers': ['console'],
+            'level': config('FLASHAI_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field